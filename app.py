@@ -4,14 +4,28 @@
 import streamlit as st
 from PIL import Image
 import exifread
-from streamlit_folium import st_folium
-import folium
 from datetime import datetime
-from typing import Optional, Tuple, Dict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Dict, List, Set, NamedTuple, TYPE_CHECKING
+import io
+import os
+import hashlib
+import ipaddress
+from urllib.parse import urlparse
 import requests
+from requests.adapters import HTTPAdapter
 import time
-from functools import lru_cache
-from streamlit.components.v1 import html
+import random
+import threading
+import queue
+import asyncio
+import math
+import diskcache
+
+# pydeck and aiohttp are imported where used to keep cold start short
+if TYPE_CHECKING:
+    import aiohttp
+    import pydeck
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Page config must be first Streamlit call
@@ -20,64 +34,320 @@ st.set_page_config(page_title="Photo Location", layout="centered")
 # Nominatim policy-compliant User-Agent (ADD YOUR CONTACT)
 POLICY_UA = "photo-location-app/1.0 (contact: your.email@example.com)"
 
+# Point NOMINATIM_URL at a self-hosted Nominatim to lift the public rate limit
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org").rstrip("/")
+NOMINATIM_REVERSE_URL = f"{NOMINATIM_URL}/reverse"
+
+def _is_local_host(host: Optional[str]) -> bool:
+    """True for localhost and loopback/private IP literals, i.e. a server we run ourselves."""
+    if not host:
+        return False
+    if host == "localhost" or host.endswith(".localhost"):
+        return True
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return ip.is_loopback or ip.is_private
+
+# Public Nominatim usage policy: at most one request per second. Any non-local
+# server gets the same treatment; the env vars override it for a remote self-host.
+NOMINATIM_THROTTLED = not _is_local_host(urlparse(NOMINATIM_URL).hostname)
+NOMINATIM_MIN_INTERVAL = float(
+    os.environ.get("NOMINATIM_MIN_INTERVAL", 1.0 if NOMINATIM_THROTTLED else 0.0)
+)
+NOMINATIM_CONCURRENCY = int(
+    os.environ.get("NOMINATIM_CONCURRENCY", 1 if NOMINATIM_THROTTLED else 8)
+)
+# (connect, read) timeouts; Nominatim can need 15s to answer
+NOMINATIM_TIMEOUT = (3.05, 15)
+NOMINATIM_ATTEMPTS = 3
+# Longest wait between attempts; a longer Retry-After means give up
+NOMINATIM_MAX_BACKOFF = 30.0
+# Pending neighbour prefetches; beyond this, new ones are dropped rather than queued
+PREFETCH_QUEUE_SIZE = 64
+
+# Coarse lookups snap to a ~100m grid (1/1100 degree of latitude) and ask
+# Nominatim for a matching zoom, so photos from the same street share one request.
+GEOCODE_TILES_PER_DEG = 1100
+GEOCODE_COARSE_ZOOM = 14
+GEOCODE_FINE_ZOOM = 18
+
+# On-disk reverse geocode cache, shared by worker processes and kept across restarts
+GEOCACHE_DIR = "/tmp/geocache"
+GEOCACHE_TTL = 86400
+# Points Nominatim has no address for are retried sooner, failed lookups sooner still
+GEOCACHE_NEGATIVE_TTL = 3600
+GEOCACHE_FAILURE_TTL = 300
+
+# exifread walks IFD0 (with the nested GPS IFD) before the EXIF SubIFD, so
+# stopping at DateTimeOriginal keeps every GPS tag yet skips the SubIFD tail.
+EXIF_STOP_TAG = "DateTimeOriginal"
+# The only tags the extractor reads (in lookup order for dates)
+EXIF_GPS_TAGS = ("GPS GPSLatitude", "GPS GPSLatitudeRef", "GPS GPSLongitude", "GPS GPSLongitudeRef")
+EXIF_DATE_TAGS = ("EXIF DateTimeOriginal", "EXIF DateTimeDigitized", "Image DateTime")
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Utilities for EXIF parsing
 
-def _ratio_to_float(r):
-    """Accept exifread.utils.Ratio or (num, den) tuple."""
-    try:
-        return float(r.num) / float(r.den)
-    except AttributeError:
-        num, den = r
-        return float(num) / float(den)
+def _may_have_exif(raw: bytes) -> bool:
+    """Header sniff: False only for a JPEG with no EXIF APP1 segment before the image data.
+
+    Other formats (PNG may carry an eXIf chunk) are left to exifread.
+    """
+    if raw[:2] != b"\xff\xd8":
+        return True
+    pos = 2
+    while pos + 4 <= len(raw) and raw[pos] == 0xFF:
+        marker = raw[pos + 1]
+        if marker == 0xFF:
+            # fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:
+            # start of scan: metadata segments are all behind us
+            break
+        if marker == 0xE1 and raw[pos + 4:pos + 9] == b"Exif\x00":
+            return True
+        pos += 2 + int.from_bytes(raw[pos + 2:pos + 4], "big")
+    return False
+
+# Weights of the degree, minute and second parts of a DMS value
+_DMS_WEIGHTS = (1.0, 1 / 60.0, 1 / 3600.0)
 
 def _dms_to_degrees(values):
-    """Convert DMS iterable (2 or 3 parts) to decimal degrees."""
-    parts = list(values)
-    if len(parts) == 2:
-        d, m = (_ratio_to_float(parts[0]), _ratio_to_float(parts[1]))
-        s = 0.0
-    else:
-        d, m, s = (
-            _ratio_to_float(parts[0]),
-            _ratio_to_float(parts[1]),
-            _ratio_to_float(parts[2]),
+    """Convert exifread DMS Ratios (2 or 3 parts) to decimal degrees."""
+    degrees = 0.0
+    for part, weight in zip(values, _DMS_WEIGHTS):
+        degrees += part.numerator / part.denominator * weight
+    return degrees
+
+# Hemisphere reference to sign; unknown references count as N/E
+_SIGN = {"N": 1.0, "S": -1.0, "E": 1.0, "W": -1.0, "n": 1.0, "s": -1.0, "e": 1.0, "w": -1.0}
+
+def _parse_exif_dt(s: str) -> datetime:
+    """Parse an EXIF "YYYY:MM:DD HH:MM:SS" date by slicing; strptime only for odd layouts."""
+    try:
+        return datetime(
+            int(s[0:4]), int(s[5:7]), int(s[8:10]),
+            int(s[11:13]), int(s[14:16]), int(s[17:19]),
         )
-    return d + m/60.0 + s/3600.0
+    except ValueError:
+        pass
+    # e.g. unpadded fields, which strptime still accepts
+    for fmt in ("%Y:%m:%d %H:%M:%S", "%Y:%m:%d %H:%M:%S%z"):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"unrecognised EXIF date: {s!r}")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Reverse geocoding with caching and polite backoff
 
-@lru_cache(maxsize=1024)
-def _reverse_cached(lat_rounded: float, lon_rounded: float) -> Optional[dict]:
-    """Low-level reverse geocode with retry/backoff and UA; cache by rounded coords."""
-    url = "https://nominatim.openstreetmap.org/reverse"
-    params = {
+GeocodeKey = Tuple[float, float, int]
+
+def _reverse_params(lat_rounded: float, lon_rounded: float, zoom: int) -> dict:
+    return {
         "lat": lat_rounded,
         "lon": lon_rounded,
+        "zoom": zoom,
         "format": "json",
         "accept-language": "en",
     }
-    for attempt in range(3):
+
+def _round_coords(lat: float, lon: float) -> Tuple[float, float]:
+    # round to ~11m precision for street-level lookups
+    return round(lat, 4), round(lon, 4)
+
+def _quantize_coords(lat: float, lon: float) -> Tuple[float, float]:
+    """Snap a point to the ~100m geocode grid; cells widen in degrees of longitude towards the poles."""
+    lat_step = 1.0 / GEOCODE_TILES_PER_DEG
+    lat_q = round(lat / lat_step) * lat_step
+    lon_step = lat_step / max(math.cos(math.radians(lat_q)), 0.01)
+    lon_q = round(lon / lon_step) * lon_step
+    return round(lat_q, 6), round(lon_q, 6)
+
+def _geocode_key(lat: float, lon: float, fine: bool = False) -> GeocodeKey:
+    """Cache key (and request) for a lookup: grid cell at town zoom, or ~11m at street zoom."""
+    if fine:
+        return _round_coords(lat, lon) + (GEOCODE_FINE_ZOOM,)
+    return _quantize_coords(lat, lon) + (GEOCODE_COARSE_ZOOM,)
+
+@st.cache_resource(show_spinner=False)
+def _geocache() -> diskcache.Cache:
+    """Process-wide handle to the on-disk geocode cache."""
+    return diskcache.Cache(GEOCACHE_DIR, size_limit=256 << 20)
+
+# Cached in place of a payload for "known miss"; falsy, unlike a cache miss (None)
+_NEGATIVE: dict = {}
+
+def _geocache_store(
+    cache: diskcache.Cache, key: GeocodeKey, data: Optional[dict]
+) -> Optional[dict]:
+    """Persist a lookup result and return it; no-address and failed lookups are cached as _NEGATIVE."""
+    if data is None:
+        cache.set(key, _NEGATIVE, expire=GEOCACHE_FAILURE_TTL)
+        return None
+    if not data.get("address"):
+        cache.set(key, _NEGATIVE, expire=GEOCACHE_NEGATIVE_TTL)
+        return None
+    cache.set(key, data, expire=GEOCACHE_TTL)
+    return data
+
+@st.cache_resource(show_spinner=False)
+def _http_session() -> requests.Session:
+    """Process-wide keep-alive session, so repeat lookups skip the TCP/TLS handshake."""
+    session = requests.Session()
+    session.headers["User-Agent"] = POLICY_UA
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class _RateLimiter:
+    """Hands out request slots at least `interval` apart, across threads and sessions."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def reserve(self) -> float:
+        """Claim the next slot; returns the seconds to wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            return slot - now
+
+    def defer(self, delay: float):
+        """Hold back every slot for `delay` seconds, e.g. when the server asks us to wait."""
+        with self.lock:
+            self.next_slot = max(self.next_slot, time.monotonic() + delay)
+
+@st.cache_resource(show_spinner=False)
+def _nominatim_limiter() -> _RateLimiter:
+    """The one limiter every Nominatim request (foreground, batch, prefetch) goes through."""
+    return _RateLimiter(NOMINATIM_MIN_INTERVAL)
+
+def _reverse_cached(lat_rounded: float, lon_rounded: float, zoom: int) -> Optional[dict]:
+    """Low-level reverse geocode, disk-cached by rounded coords and zoom."""
+    cache = _geocache()
+    key = (lat_rounded, lon_rounded, zoom)
+    data = cache.get(key)
+    if data is not None:
+        # known miss: no network call
+        return data or None
+    data = _fetch_reverse(
+        _http_session(), _nominatim_limiter(), lat_rounded, lon_rounded, zoom
+    )
+    return _geocache_store(cache, key, data)
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+    """Seconds to wait before the next attempt, or None to stop retrying.
+
+    Honors a numeric Retry-After; otherwise exponential backoff with jitter so
+    clients that failed together do not retry in lockstep.
+    """
+    if attempt + 1 >= NOMINATIM_ATTEMPTS:
+        return None
+    delay = None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            pass  # HTTP-date form; use our own schedule
+    if delay is None:
+        delay = 2 ** attempt + random.uniform(0, 1)
+    return delay if delay <= NOMINATIM_MAX_BACKOFF else None
+
+def _fetch_reverse(
+    session: requests.Session,
+    limiter: _RateLimiter,
+    lat_rounded: float,
+    lon_rounded: float,
+    zoom: int,
+) -> Optional[dict]:
+    """Blocking Nominatim request with retry/backoff; every attempt waits for a limiter slot.
+
+    Backoff (including Retry-After) is applied to the shared limiter, so the
+    whole process waits, not only the request that was turned away.
+    """
+    params = _reverse_params(lat_rounded, lon_rounded, zoom)
+    for attempt in range(NOMINATIM_ATTEMPTS):
+        retry_after = None
+        time.sleep(limiter.reserve())
         try:
-            r = requests.get(url, params=params, headers={"User-Agent": POLICY_UA}, timeout=10)
+            r = session.get(NOMINATIM_REVERSE_URL, params=params, timeout=NOMINATIM_TIMEOUT)
             if r.status_code == 200:
                 return r.json()
-            if r.status_code == 429:
-                time.sleep(1.5 * (attempt + 1))
-                continue
-            # Non-OK
-            return None
+            if r.status_code != 429:
+                # Non-OK
+                return None
+            retry_after = r.headers.get("Retry-After")
         except requests.RequestException:
-            time.sleep(0.5 * (attempt + 1))
+            pass
+        delay = _retry_delay(attempt, retry_after)
+        if delay is None:
+            break
+        limiter.defer(delay)
+    return None
+
+async def _reverse_async(
+    session: "aiohttp.ClientSession",
+    limiter: _RateLimiter,
+    lat_rounded: float,
+    lon_rounded: float,
+    zoom: int,
+) -> Optional[dict]:
+    """Async counterpart of _fetch_reverse; limiter waits yield to the event loop."""
+    import aiohttp
+
+    params = _reverse_params(lat_rounded, lon_rounded, zoom)
+    timeout = aiohttp.ClientTimeout(
+        sock_connect=NOMINATIM_TIMEOUT[0], sock_read=NOMINATIM_TIMEOUT[1]
+    )
+    for attempt in range(NOMINATIM_ATTEMPTS):
+        retry_after = None
+        await asyncio.sleep(limiter.reserve())
+        try:
+            async with session.get(
+                NOMINATIM_REVERSE_URL, params=params, timeout=timeout
+            ) as r:
+                if r.status == 200:
+                    return await r.json()
+                if r.status != 429:
+                    # Non-OK
+                    return None
+                retry_after = r.headers.get("Retry-After")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            # ValueError: malformed JSON body, as requests reports via RequestException
+            pass
+        delay = _retry_delay(attempt, retry_after)
+        if delay is None:
+            break
+        limiter.defer(delay)
     return None
 
-def reverse_geocode(lat: float, lon: float) -> Optional[Dict[str, str]]:
-    """High-level reverse geocode to normalized dict."""
-    # round to ~11m precision to boost cache hits yet keep city-level accuracy
-    lat_r = round(lat, 4)
-    lon_r = round(lon, 4)
-    data = _reverse_cached(lat_r, lon_r)
+async def _gather(keys: List[GeocodeKey], limiter: _RateLimiter) -> List[Optional[dict]]:
+    """Run lookups on one pooled session, spaced by the shared limiter."""
+    import aiohttp
+
+    sem = asyncio.Semaphore(NOMINATIM_CONCURRENCY)
+
+    async def one(session, key):
+        async with sem:
+            return await _reverse_async(session, limiter, *key)
+
+    connector = aiohttp.TCPConnector(limit_per_host=NOMINATIM_CONCURRENCY)
+    async with aiohttp.ClientSession(
+        connector=connector, headers={"User-Agent": POLICY_UA}
+    ) as session:
+        return await asyncio.gather(*(one(session, key) for key in keys))
+
+def _normalize_address(data: Optional[dict]) -> Optional[Dict[str, str]]:
+    """Flatten a Nominatim reverse payload into the fields the UI shows."""
     if not data:
         return None
     address = data.get("address", {}) or {}
@@ -95,36 +365,159 @@ def reverse_geocode(lat: float, lon: float) -> Optional[Dict[str, str]]:
         "raw": data,
     }
 
+def reverse_geocode(lat: float, lon: float, fine: bool = False) -> Optional[Dict[str, str]]:
+    """High-level reverse geocode to normalized dict (town level unless fine)."""
+    return _normalize_address(_reverse_cached(*_geocode_key(lat, lon, fine)))
+
+def reverse_geocode_many(coords: List[Tuple[float, float]]) -> List[Optional[Dict[str, str]]]:
+    """Town-level reverse geocode of several points in one event loop; results follow input order.
+
+    Points are grouped by grid cell, so each cell costs at most one request.
+    """
+    keys = [_geocode_key(lat, lon) for lat, lon in coords]
+    cache = _geocache()
+    results = {k: cache.get(k) for k in dict.fromkeys(keys)}
+    missing = [k for k, data in results.items() if data is None]
+    if missing:
+        for k, data in zip(missing, asyncio.run(_gather(missing, _nominatim_limiter()))):
+            results[k] = _geocache_store(cache, k, data)
+    return [_normalize_address(results[k]) for k in keys]
+
+def _neighbor_keys(key: GeocodeKey) -> List[GeocodeKey]:
+    """Keys of the (up to) 8 grid cells surrounding a coarse key."""
+    lat_q, lon_q, zoom = key
+    lat_step = 1.0 / GEOCODE_TILES_PER_DEG
+    keys = []
+    for dlat in (-1, 0, 1):
+        lat_n = lat_q + dlat * lat_step
+        if abs(lat_n) > 90.0:
+            continue
+        lon_step = lat_step / max(math.cos(math.radians(lat_n)), 0.01)
+        for dlon in (-1, 0, 1):
+            keys.append(_quantize_coords(lat_n, lon_q + dlon * lon_step) + (zoom,))
+    # cells collapse near the poles; never include the centre itself
+    return [k for k in dict.fromkeys(keys) if k != key]
+
+class _Prefetcher:
+    """One background worker per process, fed by a bounded queue of geocode keys."""
+
+    def __init__(self, cache: diskcache.Cache, session: requests.Session, limiter: _RateLimiter):
+        self.cache = cache
+        self.session = session
+        self.limiter = limiter
+        self.lock = threading.Lock()
+        self.inflight: Set[GeocodeKey] = set()
+        self.queue: "queue.Queue[GeocodeKey]" = queue.Queue(maxsize=PREFETCH_QUEUE_SIZE)
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def schedule(self, keys: List[GeocodeKey]):
+        """Queue keys that are neither cached nor pending; drop them once the queue is full."""
+        with self.lock:
+            for key in keys:
+                if key in self.inflight or key in self.cache:
+                    continue
+                try:
+                    self.queue.put_nowait(key)
+                except queue.Full:
+                    break
+                self.inflight.add(key)
+
+    def _run(self):
+        while True:
+            key = self.queue.get()
+            try:
+                if key not in self.cache:
+                    data = _fetch_reverse(self.session, self.limiter, *key)
+                    _geocache_store(self.cache, key, data)
+            except Exception:
+                pass  # keep the worker alive; the key can be queued again later
+            finally:
+                with self.lock:
+                    self.inflight.discard(key)
+
+@st.cache_resource(show_spinner=False)
+def _prefetcher() -> _Prefetcher:
+    return _Prefetcher(_geocache(), _http_session(), _nominatim_limiter())
+
+def prefetch_neighbors(lat: float, lon: float):
+    """Queue the cells around a point for the background prefetch worker."""
+    _prefetcher().schedule(_neighbor_keys(_geocode_key(lat, lon)))
+
+class _Uncached(Exception):
+    """Carries a result out of a st.cache_data function without memoizing it."""
+
+    def __init__(self, value):
+        super().__init__()
+        self.value = value
+
 @st.cache_data(ttl=86400, show_spinner=False)
-def reverse_geocode_cached(lat: float, lon: float) -> Optional[Dict[str, str]]:
-    """Streamlit-cached wrapper (per-day) to avoid repeated API calls within the app."""
-    return reverse_geocode(lat, lon)
+def _reverse_geocode_day(lat: float, lon: float, fine: bool) -> Dict[str, str]:
+    address = reverse_geocode(lat, lon, fine)
+    if address is None:
+        raise _Uncached(address)
+    return address
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _reverse_geocode_many_day(
+    coords: Tuple[Tuple[float, float], ...],
+) -> List[Dict[str, str]]:
+    addresses = reverse_geocode_many(list(coords))
+    if None in addresses:
+        raise _Uncached(addresses)
+    return addresses
+
+def reverse_geocode_cached(lat: float, lon: float, fine: bool = False) -> Optional[Dict[str, str]]:
+    """Streamlit-cached wrapper (per-day) to avoid repeated API calls within the app.
+
+    Only found addresses are kept for the day; misses go back to the disk
+    cache, whose shorter TTLs decide when to ask Nominatim again.
+    """
+    try:
+        return _reverse_geocode_day(lat, lon, fine)
+    except _Uncached as e:
+        return e.value
+
+def reverse_geocode_many_cached(
+    coords: Tuple[Tuple[float, float], ...],
+) -> List[Optional[Dict[str, str]]]:
+    """Streamlit-cached wrapper for a whole upload batch; batches with a miss are not kept."""
+    try:
+        return _reverse_geocode_many_day(coords)
+    except _Uncached as e:
+        return e.value
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Metadata extractor
 
+@dataclass
+class PhotoMeta:
+    """Metadata read from a photo's EXIF."""
+    # declared by hand: dataclass(slots=True) needs Python 3.10
+    __slots__ = ("coords", "date")
+    coords: Optional[Tuple[float, float]]
+    date: Optional[str]
+
 class PhotoMetadataExtractor:
     """Handles extraction of metadata from photo files."""
 
-    def get_gps_coordinates(self, tags: dict) -> Optional[Tuple[float, float]]:
-        """Extract GPS coordinates from EXIF tags (robust)."""
-        lat_tag = tags.get("GPS GPSLatitude")
-        lat_ref_tag = tags.get("GPS GPSLatitudeRef")
-        lon_tag = tags.get("GPS GPSLongitude")
-        lon_ref_tag = tags.get("GPS GPSLongitudeRef")
+    def extract(self, tags: dict) -> PhotoMeta:
+        """Read the GPS and date tags in one sweep."""
+        lat_tag, lat_ref_tag, lon_tag, lon_ref_tag = (tags.get(k) for k in EXIF_GPS_TAGS)
+        date_tag = next((v for v in map(tags.get, EXIF_DATE_TAGS) if v), None)
+        return PhotoMeta(
+            coords=self._coordinates(lat_tag, lat_ref_tag, lon_tag, lon_ref_tag),
+            date=self._format_date(date_tag),
+        )
 
+    @staticmethod
+    def _coordinates(lat_tag, lat_ref_tag, lon_tag, lon_ref_tag) -> Optional[Tuple[float, float]]:
+        """GPS coordinates from the four EXIF GPS tags (robust)."""
         if not all([lat_tag, lat_ref_tag, lon_tag, lon_ref_tag]):
             return None
 
         try:
-            lat = _dms_to_degrees(lat_tag.values)
-            lon = _dms_to_degrees(lon_tag.values)
-            lat_ref = str(lat_ref_tag.values[0]).upper()
-            lon_ref = str(lon_ref_tag.values[0]).upper()
-            if lat_ref == "S":
-                lat = -lat
-            if lon_ref == "W":
-                lon = -lon
+            lat = _dms_to_degrees(lat_tag.values) * _SIGN.get(lat_ref_tag.values[0], 1.0)
+            lon = _dms_to_degrees(lon_tag.values) * _SIGN.get(lon_ref_tag.values[0], 1.0)
             if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
                 return None
             return (lat, lon)
@@ -132,55 +525,93 @@ class PhotoMetadataExtractor:
             return None
 
     @staticmethod
-    def get_date_taken(tags: dict) -> Optional[str]:
-        """Extract and format the date the photo was taken."""
-        keys = ["EXIF DateTimeOriginal", "EXIF DateTimeDigitized", "Image DateTime"]
-        for k in keys:
-            v = tags.get(k)
-            if not v:
-                continue
-            s = str(v)
-            for fmt in ("%Y:%m:%d %H:%M:%S", "%Y:%m:%d %H:%M:%S%z"):
-                try:
-                    dt = datetime.strptime(s, fmt)
-                    return dt.strftime("%d %B %Y")
-                except Exception:
-                    pass
+    def _format_date(date_tag) -> Optional[str]:
+        """Format the date the photo was taken; unparseable dates are shown as-is."""
+        if not date_tag:
+            return None
+        s = str(date_tag)
+        try:
+            return _parse_exif_dt(s).strftime("%d %B %Y")
+        except ValueError:
             return s
-        return None
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Map rendering
 
+# Each pydeck chart holds two WebGL contexts and browsers allow about 16,
+# so a batch shares one map instead of drawing one per photo.
+MAP_MAX_ZOOM = 15
+
 class MapRenderer:
     """Handles map rendering functionality."""
 
     @staticmethod
-    def create_location_map(lat: float, lon: float) -> folium.Map:
-        """Create a folium map with a marker at the specified coordinates."""
-        map_obj = folium.Map(location=[lat, lon], zoom_start=15)
-        folium.Marker([lat, lon], popup=str("Photo Location")).add_to(map_obj)
-        return map_obj
+    def create_location_map(markers: Tuple[Tuple[float, float, str], ...]) -> "pydeck.Deck":
+        """Create a deck.gl map with a marker per (lat, lon, name), framed to fit them all."""
+        import pydeck
+        from pydeck.data_utils import compute_view
+
+        marker = pydeck.Layer(
+            "ScatterplotLayer",
+            data=[{"position": [lon, lat], "name": name} for lat, lon, name in markers],
+            get_position="position",
+            get_radius=50,
+            radius_min_pixels=6,
+            get_fill_color=[220, 50, 50, 200],
+            pickable=True,
+        )
+        view = compute_view([[lon, lat] for lat, lon, _ in markers])
+        # nearby (or single) markers would otherwise zoom in past street level
+        view.zoom = min(view.zoom, MAP_MAX_ZOOM)
+        return pydeck.Deck(
+            layers=[marker],
+            initial_view_state=view,
+            map_style="road",
+            tooltip={"text": "{name}"},
+        )
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def location_map(markers: Tuple[Tuple[float, float, str], ...]) -> "pydeck.Deck":
+    """Map spec for a set of markers, shared across reruns and sessions so it is built once."""
+    return MapRenderer.create_location_map(markers)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # UI
 
+# Streamlit never shows images wider than this, so uploads are decoded at most this big
+DISPLAY_MAX_SIZE = (1460, 1460)
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _decode_image(file_hash: str, _raw: bytes) -> Image.Image:
+    """Display-sized decode of an upload, keyed by content hash (the raw bytes are not hashed)."""
+    image = Image.open(io.BytesIO(_raw))
+    # JPEG can decode straight to a reduced scale
+    image.draft(None, DISPLAY_MAX_SIZE)
+    image.thumbnail(DISPLAY_MAX_SIZE)
+    return image
+
+class LoadedPhoto(NamedTuple):
+    """An opened upload with the metadata parsed from it."""
+    image: Image.Image
+    tags: dict
+    meta: PhotoMeta
+
 class PhotoLocationUI:
     """Handles the Streamlit UI components."""
 
     def __init__(self):
         self.metadata_extractor = PhotoMetadataExtractor()
-        self.map_renderer = MapRenderer()
 
     def header(self):
         st.title("Photo Location")
-        st.write("Upload a photo to extract and visualize its location from metadata.")
+        st.write("Upload photos to extract and visualize their location from metadata.")
 
     def display_metadata(
         self,
         date_taken: Optional[str],
         coordinates: Optional[Tuple[float, float]],
         address: Optional[Dict[str, str]] = None,
+        key: str = "",
     ):
         """Display photo metadata in a formatted layout."""
         with st.container():
@@ -233,72 +664,149 @@ class PhotoLocationUI:
                 with st.expander("Full Location Data"):
                     st.json(raw)
 
-            # Address details
-            st.subheader("📍 Address Details")
-            detail_col1, detail_col2 = st.columns(2)
-            with detail_col1:
-                if address.get("state"):
-                    st.markdown(f"**State/Province:** {address['state']}")
-                if address.get("county"):
-                    st.markdown(f"**County:** {address['county']}")
-                if address.get("suburb"):
-                    st.markdown(f"**Suburb/Neighborhood:** {address['suburb']}")
-
-            with detail_col2:
-                if address.get("road"):
-                    st.markdown(f"**Street:** {address['road']}")
-                if address.get("house_number"):
-                    st.markdown(f"**House Number:** {address['house_number']}")
-                if address.get("postcode"):
-                    st.markdown(f"**Postal Code:** {address['postcode']}")
+            self.display_address_details(address, key)
 
         elif coordinates:
-            st.info("📍 Getting location details…")
+            st.info("📍 No address found for this location.")
 
-    def display_map(self, coordinates):
-        if not coordinates:
+    @staticmethod
+    def street_toggle_key(uploaded_file) -> str:
+        return f"street_{uploaded_file.file_id}"
+
+    def display_address_details(self, address: Dict[str, str], key: str = ""):
+        """Address details; street-level fields are only present once the toggle is on."""
+        st.subheader("📍 Address Details")
+        st.toggle("Look up street address", key=key)
+
+        detail_col1, detail_col2 = st.columns(2)
+        with detail_col1:
+            if address.get("state"):
+                st.markdown(f"**State/Province:** {address['state']}")
+            if address.get("county"):
+                st.markdown(f"**County:** {address['county']}")
+            if address.get("suburb"):
+                st.markdown(f"**Suburb/Neighborhood:** {address['suburb']}")
+
+        with detail_col2:
+            if address.get("road"):
+                st.markdown(f"**Street:** {address['road']}")
+            if address.get("house_number"):
+                st.markdown(f"**House Number:** {address['house_number']}")
+            if address.get("postcode"):
+                st.markdown(f"**Postal Code:** {address['postcode']}")
+
+    def display_map(self, markers: List[Tuple[Tuple[float, float], str]]):
+        """One map with a marker per (coordinates, name)."""
+        if not markers:
             return
-        lat, lon = coordinates
-        map_obj = self.map_renderer.create_location_map(lat, lon)
-        html(map_obj._repr_html_(), height=500)
-
-    def process_uploaded_file(self, uploaded_file):
-        """Process the uploaded photo file and extract metadata."""
-        # Show image (limit size)
+        # key on the coordinates as displayed; finer noise would only miss the cache
+        spec = tuple((round(lat, 6), round(lon, 6), name) for (lat, lon), name in markers)
+        st.pydeck_chart(location_map(spec), height=500)
+
+    def load_photo(self, uploaded_file) -> Optional[LoadedPhoto]:
+        """Open the uploaded photo and extract its metadata; None if unreadable."""
+        # Read the upload once; decoding and EXIF parsing share the bytes
+        raw = uploaded_file.getvalue()
+        file_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
         try:
-            image = Image.open(uploaded_file)
-            st.image(image, caption="Uploaded Photo")
+            image = _decode_image(file_hash, raw)
         except Exception:
-            st.error("Could not open image.")
-            return
+            return None
 
-        # Reset file pointer and parse EXIF
-        uploaded_file.seek(0)
-        try:
-            tags = exifread.process_file(uploaded_file, details=False)
-        except Exception:
-            tags = {}
+        tags = {}
+        if _may_have_exif(raw):
+            try:
+                # no MakerNote/thumbnails, tolerate malformed tags, short printables
+                tags = exifread.process_file(
+                    io.BytesIO(raw),
+                    details=False,
+                    strict=False,
+                    truncate_tags=True,
+                    stop_tag=EXIF_STOP_TAG,
+                )
+            except Exception:
+                tags = {}
 
-        if not tags:
-            st.info("No EXIF metadata found (or metadata stripped).")
+        return LoadedPhoto(
+            image=image,
+            tags=tags,
+            meta=self.metadata_extractor.extract(tags),
+        )
 
-        # Extract metadata
-        coordinates = self.metadata_extractor.get_gps_coordinates(tags)
-        date_taken = self.metadata_extractor.get_date_taken(tags)
+    def display_photo(
+        self,
+        uploaded_file,
+        photo: Optional[LoadedPhoto],
+        address: Optional[Dict[str, str]],
+        show_map: bool = True,
+    ):
+        """Display one photo with its metadata and (unless part of a batch map) its map."""
+        if photo is None:
+            st.error(f"Could not open image {uploaded_file.name}.")
+            return
+        st.image(photo.image, caption=uploaded_file.name)
 
-        # Reverse geocode if coords present
-        address = None
-        if coordinates:
-            lat, lon = coordinates
-            address = reverse_geocode_cached(lat, lon)
-        else:
-            if tags:
-                st.info("Photo has EXIF but no GPS location.")
+        if not photo.tags:
+            st.info("No EXIF metadata found (or metadata stripped).")
+        elif not photo.meta.coords:
+            st.info("Photo has EXIF but no GPS location.")
 
         # Display metadata and map
-
-        self.display_metadata(date_taken, coordinates, address)
-        self.display_map(coordinates)
+        self.display_metadata(
+            photo.meta.date,
+            photo.meta.coords,
+            address,
+            key=self.street_toggle_key(uploaded_file),
+        )
+        if show_map and photo.meta.coords:
+            self.display_map([(photo.meta.coords, uploaded_file.name)])
+
+    def process_uploaded_files(self, uploaded_files):
+        """Process the uploaded photos; reverse geocoding runs once for the whole batch."""
+        photos = [self.load_photo(f) for f in uploaded_files]
+        located = [
+            (p.meta.coords, bool(st.session_state.get(self.street_toggle_key(f))))
+            if p and p.meta.coords else None
+            for f, p in zip(uploaded_files, photos)
+        ]
+
+        # Results are keyed by (coords, fine), so each photo follows its own
+        # street toggle. The street-level payload already carries the
+        # town-level fields, so photos with the toggle on skip the town batch
+        # (unless their street lookup found nothing).
+        addresses = {}
+        wanted = list(dict.fromkeys(k for k in located if k))
+        if wanted:
+            with st.spinner("Looking up locations…"):
+                for coords, fine in wanted:
+                    if fine:
+                        addresses[coords, True] = reverse_geocode_cached(*coords, fine=True)
+                coarse = list(dict.fromkeys(
+                    c for c, fine in wanted if not addresses.get((c, fine))
+                ))
+                if coarse:
+                    results = reverse_geocode_many_cached(tuple(coarse))
+                    addresses.update(((c, False), r) for c, r in zip(coarse, results))
+            # a failed or empty lookup says nothing about the neighbours, and
+            # speculative requests to a failing server only risk a block
+            for lat, lon in dict.fromkeys(c for (c, _), r in addresses.items() if r):
+                prefetch_neighbors(lat, lon)
+
+        # Several located photos share one map at the top
+        markers = [(key[0], f.name) for f, key in zip(uploaded_files, located) if key]
+        batch_map = len(markers) > 1
+        if batch_map:
+            st.subheader("🗺️ Photo Locations")
+            self.display_map(markers)
+            st.divider()
+
+        for i, (uploaded_file, photo, key) in enumerate(zip(uploaded_files, photos, located)):
+            if i:
+                st.divider()
+            address = None
+            if key:
+                address = addresses.get(key) or addresses.get((key[0], False))
+            self.display_photo(uploaded_file, photo, address, show_map=not batch_map)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Main
@@ -307,9 +815,11 @@ def main():
     ui = PhotoLocationUI()
     ui.header()
 
-    uploaded_file = st.file_uploader("Choose a photo", type=["jpg", "jpeg", "png"])
-    if uploaded_file:
-        ui.process_uploaded_file(uploaded_file)
+    uploaded_files = st.file_uploader(
+        "Choose photos", type=["jpg", "jpeg", "png"], accept_multiple_files=True
+    )
+    if uploaded_files:
+        ui.process_uploaded_files(uploaded_files)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file